@@ -1,8 +1,14 @@
+from importlib.util import find_spec
 from subprocess import check_call
 from sys import executable
 from pathlib import Path
 
 requirements = Path(__file__).resolve().parent.joinpath("requirements.txt")
 
-check_call([executable, "-m", "pip", "install", "--quiet", "-r",
-           str(requirements)])  # TODO make pip quiet
+# modules installed by requirements.txt, one missing means a broken install
+REQUIRED_MODULES = ("sqlalchemy", "sentence_transformers", "tika")
+
+# only bootstrap the requirements on a broken install, never on every import
+if any(find_spec(module) is None for module in REQUIRED_MODULES):
+    check_call([executable, "-m", "pip", "install", "--quiet", "-r",
+               str(requirements)])
@@ -7,6 +7,8 @@
 #     hovertemplate="<b>Cluster %{label}</b><br><br>%{text}<extra></extra>"
 # ), layout=dict(margin=dict(t=20, b=0, l=0, r=0)))
 
+from functools import cached_property
+from math import isqrt
 from typing import Dict, Iterable
 
 import numpy as np
@@ -19,7 +21,25 @@ from ..manifold.umap import UMAP
 
 
 class HDBSCAN(Clusterer):
-    def __init__(self, **kwargs):
+    # derived from the fitted model, cleared on every fit
+    CACHED_PROPERTIES = ("cluster_docs", "coverage", "n_clusters",
+                         "_reference")
+
+    # parameters understood by fast_hdbscan.HDBSCAN
+    FAST_PARAMS = ("min_cluster_size", "min_samples",
+                   "cluster_selection_epsilon", "cluster_selection_method",
+                   "allow_single_cluster")
+
+    def __init__(self, backend: str = "hdbscan", **kwargs):
+        """HDBSCAN clusterer over a UMAP reduction of the input
+
+        Keyword arguments:
+        backend (str) -- "hdbscan" for the reference implementation or "fast"
+            for fast_hdbscan's parallel Numba implementation, which is much
+            quicker on large inputs; it has no condensed tree nor soft
+            clustering, so `cluster_docs`, `tree` and `transform` fit the
+            reference implementation on the same embedding when first used
+        """
         params = dict(
             min_cluster_size=50,
             core_dist_n_jobs=-1,
@@ -29,7 +49,18 @@ class HDBSCAN(Clusterer):
             prediction_data=True)
         params.update(kwargs)
 
-        self._model = hdbscan.HDBSCAN(**params)
+        if backend == "fast":
+            import fast_hdbscan
+
+            self._model = fast_hdbscan.HDBSCAN(**{
+                key: value for key, value in params.items()
+                if key in self.FAST_PARAMS})
+        elif backend == "hdbscan":
+            self._model = hdbscan.HDBSCAN(**params)
+        else:
+            raise ValueError(f"Backend '{backend}' is not a valid backend")
+        self._backend = backend
+        self._n_points = 0
 
         super(HDBSCAN, self).__init__(**params)
 
@@ -37,22 +68,30 @@ class HDBSCAN(Clusterer):
     def labels(self) -> Iterable:
         return self._model.labels_
 
-    @property
+    @cached_property
+    def _reference(self) -> hdbscan.HDBSCAN:
+        """The fitted model if it is the reference implementation, else one
+        fitted on the same embedding, for what only that one provides"""
+        if self._backend == "hdbscan":
+            return self._model
+        return hdbscan.HDBSCAN(**self._params).fit(self._embedding)
+
+    @cached_property
     def cluster_docs(self) -> Dict[str, Iterable]:
-        graph_df = self._model.condensed_tree_.to_pandas()
-        doc_clusters = {}
-        for i, cluster in enumerate(graph_df[graph_df.child_size > 1].child):
-            doc_clusters[f"cluster_{i}"] = graph_df[
-                (graph_df.child_size == 1) & (graph_df.parent == cluster)
-            ].child.to_list()
+        graph_df = self._reference.condensed_tree_.to_pandas()
 
-        return doc_clusters
+        leaves = graph_df[graph_df.child_size == 1]
+        clusters = graph_df.loc[graph_df.child_size > 1, "child"].to_numpy()
+        docs = leaves.groupby("parent")["child"].apply(list)
 
-    @property
+        return {f"cluster_{i}": docs.get(cluster, [])
+                for i, cluster in enumerate(clusters)}
+
+    @cached_property
     def coverage(self) -> float:
-        return np.sum(self.labels >= 0) / len(self)
+        return int((self._model.labels_ >= 0).sum()) / len(self)
 
-    @property
+    @cached_property
     def n_clusters(self) -> int:
         return np.unique(self.labels).shape[0] - 1  # -1 means unclustered
 
@@ -62,20 +101,31 @@ class HDBSCAN(Clusterer):
 
     @property
     def tree(self):
-        return self._model.condensed_tree_.to_networkx()
+        return self._reference.condensed_tree_.to_networkx()
 
     def fit(self, X: Iterable, **kwargs) -> Clusterer:
-        X = np.array(X)
+        X = np.ascontiguousarray(X, dtype=np.float32)  # no copy if already is
         self._embedding = UMAP(
-            n_components=int(X.shape[1]**0.5)
-        ).fit_transform([*X])
+            n_components=isqrt(X.shape[1])
+        ).fit_transform(X)
 
         self._model.fit(self._embedding, **kwargs)
+        self._n_points = self._embedding.shape[0]
+        self.__clear_cache()
 
         return self
 
     def transform(self, X: Iterable, **kwargs) -> Iterable:
-        return hdbscan.prediction.all_points_membership_vectors(self._model)
+        return hdbscan.prediction.all_points_membership_vectors(
+            self._reference)
+
+    def __len__(self) -> int:
+        return self._n_points
 
     def predict(self, X: Iterable, **kwargs) -> Iterable:
+        self.__clear_cache()
         return self._model.fit_predict(X, **kwargs)
+
+    def __clear_cache(self):
+        for attr in self.CACHED_PROPERTIES:
+            self.__dict__.pop(attr, None)
@@ -2,11 +2,11 @@ from abc import ABC
 from datetime import datetime
 from typing import Any, Generator, Iterable, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 from pydantic import BaseModel, Field
 from pyparsing import abstractmethod
 from sqlalchemy import desc
-from sqlalchemy.exc import OperationalError
 from tabulate import tabulate
 
 from common.database.connector import DriverDB
@@ -15,30 +15,20 @@ from common.models.settings import Settings
 from ..database.service import ServiceDB
 from ..embeddings.sbert import SBert
 from ..models.document import Document, DocumentEmbedding
-from ..utils.concurrency import batch_processing
 from ..utils.miscellaneous import are_instances
 from .vocab import NGram, Vocab
 
 
-def process_ngrams(data: Any, **kwargs):
-    ngram, frequency = data
-
-    with DriverDB.session_scope(**kwargs) as session:
-        while True:
-            try:
-                if (new_ngram := session.get(NGram, NGram.hash(ngram))) != None:
-                    new_ngram.frequency += frequency
-                else:
-                    new_ngram = NGram(ngram, frequency)
-
-                new_ngram.occurence += 1
-
-                value = new_ngram
-                break
-            except OperationalError:
-                continue
-
-    return value
+DATAFRAME_DTYPES = {
+    "id": "Int64",
+    "doi": "string",
+    "url": "string",
+    "title": "string",
+    "content": "string",
+    "abstract": "string",
+    "citations": "Int64",
+    "source": "string",
+    "date": "datetime64[ns]"}
 
 
 class CorpusBaseQuery(BaseModel):
@@ -97,7 +87,8 @@ class CorpusControllerBase(ABC):
             isinstance(indexer, int),
             isinstance(indexer, slice),
             isinstance(indexer, str),
-            isinstance(indexer, Iterable) and are_instances(indexer, str))
+            isinstance(indexer, (list, tuple, set, frozenset))
+            and are_instances(indexer, str))
 
         if is_int:
             return self._db.find_by_index(indexer)
@@ -107,16 +98,34 @@ class CorpusControllerBase(ABC):
             if is_str:
                 indexer = [indexer]
 
-            if any(i for i in indexer if i not in Document.FIELDS):
-                raise KeyError(f"Key '{indexer}' not found.")
+            if missing := set(indexer) - Document.field_set:
+                raise KeyError(f"Keys {sorted(missing)} not found.")
+
+            if [*indexer] == ["embedding"]:
+                return self.embeddings
 
             return self._db.select_columns(indexer)
         else:
             raise KeyError(f"Key '{indexer}' is not a valid indexer.")
 
+    @property
+    def embeddings(self) -> np.ndarray:
+        """Document embeddings as one (n_documents, dimension) float16 array,
+        read in a single pass in document id order, so that its rows line up
+        with self["id"]; documents without an embedding get a NaN row"""
+        embeddings = [*self._db.select_related(DocumentEmbedding.embedding)]
+
+        dimension = next(
+            (len(embedding) for embedding in embeddings if embedding), 0)
+        missing = [np.nan] * dimension
+
+        return np.array(
+            [missing if embedding is None else embedding
+             for embedding in embeddings],
+            dtype=np.float16).reshape(len(embeddings), dimension)
+
     def __iter__(self) -> Generator:
-        for document in self.documents:
-            yield document
+        yield from self.documents
 
     def len(self, query: CorpusBaseQuery = None) -> int:
         return self._db.len(self.__get_filter_params(query)
@@ -141,7 +150,15 @@ class CorpusControllerBase(ABC):
             sort=self.__get_sort_params(query))
 
     def as_dataframe(self) -> pd.DataFrame:
-        return pd.DataFrame.from_records(doc.asdict() for doc in self.documents)
+        # embedding is a relationship, not a column of the documents table
+        columns = [field for field in Document.FIELDS if field != "embedding"]
+        values = [*zip(*self._db.select_columns(columns))] or \
+            [()] * len(columns)
+
+        return pd.DataFrame({
+            column: pd.array([*value],
+                             dtype=DATAFRAME_DTYPES.get(column, object))
+            for column, value in zip(columns, values)})
 
     def as_series(self, key: str) -> pd.Series:
         return pd.Series(self[key])
@@ -150,7 +167,7 @@ class CorpusControllerBase(ABC):
         return tabulate([["Number of documents", len(self)]])
 
     def __contains__(self, doc: Document) -> bool:
-        return next((it for it in self if it.id == doc.id), None) is not None
+        return self._db.exists(doc.id)
 
     def __del__(self):
         del self._db, self._db_embeddings
@@ -204,39 +221,53 @@ class CorpusController(CorpusControllerBase):
     def index(self) -> Iterable[int]:
         return self._db.index
 
-    def calculate_document_embeddings(self):
+    def calculate_document_embeddings(self, batch_size: int = 256):
         encoder: SBert = SBert()
 
-        for doc_id, embedding in zip(self["id"],
-                                     encoder.encode_documents(self["content"])):
-            DocumentEmbedding(document_id=doc_id,
-                              embedding=embedding).save(**self._kwargs)
+        # encode and store each batch as it is read, so neither the contents
+        # nor the embeddings of the whole corpus are held at once; existing
+        # embeddings are overwritten, which also rewrites float32 rows
+        for ids, contents in self._db.iter_columns(["id", "content"],
+                                                   batch_size=batch_size):
+            self._db_embeddings.upsert(
+                rows=[dict(document_id=doc_id, embedding=embedding)
+                      for doc_id, embedding in zip(
+                          ids, encoder.encode_documents(contents))],
+                index_elements=[DocumentEmbedding.document_id],
+                set_=lambda excluded: dict(embedding=excluded.embedding))
 
         del encoder
 
-    def build_vocab(self, resume: bool = False):
+    def build_vocab(self, resume: bool = False, batch_size: int = 100):
         if not resume:
             self.clear_vocab()
             self._db_settings.set("last_document_processed", 0, **self._kwargs)
 
+        def flush(index: int):
+            self._vocab.add_ngrams(batch)
+            batch.clear()
+            self._db_settings.set(
+                "last_document_processed", index, **self._kwargs)
+
         corpus_len = len(self)
         last_document_processed = self._db_settings.get(
             "last_document_processed", **self._kwargs).value
+        batch = []
         for index, document in enumerate(self, 1):
             print(f"Processing document {index}/{corpus_len}", end="\r")
 
             if resume and index <= last_document_processed:
                 continue
 
-            ngrams = batch_processing(fn=process_ngrams,
-                                      data=[item for item in document.ngrams.items()
-                                            if item[1] > 1],
-                                      **self._kwargs)
+            batch.append({
+                ngram: frequency
+                for ngram, frequency in document.ngrams.items()
+                if frequency > 1})
+            if len(batch) >= batch_size:
+                flush(index)
 
-            self._vocab._db.bulk_update(ngrams)
-            ngrams.clear()
-            self._db_settings.set(
-                "last_document_processed", index, **self._kwargs)
+        if batch:
+            flush(index)
 
         self._vocab._db.delete_where(NGram.occurence == 1)
 
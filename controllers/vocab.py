@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import Iterable
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable
 
 import pandas as pd
+from sqlalchemy.orm import selectinload
 from tabulate import tabulate
 from common.database.connector import DriverDB
 
@@ -13,6 +16,13 @@ from ..database.service import ServiceDB
 from ..models.ngram import NGram, NGramEmbedding
 
 
+DATAFRAME_DTYPES = {
+    "id": "string",
+    "ngram": "string",
+    "frequency": "Int64",
+    "occurence": "Int64"}
+
+
 class VocabBase(ABC):
     def __init__(self, **kwargs):
         DriverDB(**kwargs).create_all()
@@ -28,15 +38,18 @@ class VocabBase(ABC):
 
     @property
     def ngrams(self) -> Iterable[NGram]:
-        return self._db.rows()
+        # embeddings are loaded per yield_per batch with one IN query,
+        # instead of one lazy load per ngram
+        return self._db.rows(selectinload(NGram.embedding))
 
     def __iter__(self) -> Iterable[NGram]:
-        for ngram in self.ngrams:
-            yield ngram
+        yield from self.ngrams
 
-    def __getitem__(self, indexer: int | str) -> NGram:
+    def __getitem__(self, indexer: int | str | Iterable[str]) -> NGram:
         if isinstance(indexer, str):
             return self._db.find(NGram.hash(indexer))
+        elif isinstance(indexer, (list, tuple, set, frozenset)):
+            return self._db.find_many(NGram.hash(ngram) for ngram in indexer)
         elif isinstance(indexer, int):
             return self._db.find_by_index(indexer)
         elif isinstance(indexer, slice):
@@ -46,7 +59,14 @@ class VocabBase(ABC):
                 indexer, type(indexer)))
 
     def as_dataframe(self) -> pd.DataFrame:
-        return pd.DataFrame.from_records(ngram.asdict() for ngram in self.ngrams)
+        # embedding is a relationship, not a column of the ngrams table
+        columns = [field for field in NGram.FIELDS if field != "embedding"]
+        values = [*zip(*self._db.select_columns(columns))] or \
+            [()] * len(columns)
+
+        return pd.DataFrame({
+            column: pd.array([*value], dtype=DATAFRAME_DTYPES[column])
+            for column, value in zip(columns, values)})
 
     def __len__(self) -> int:
         return len(self.index)
@@ -54,10 +74,17 @@ class VocabBase(ABC):
     def __repr__(self) -> str:
         return tabulate([["Vocabulary size", len(self)]])
 
-    def __contains__(self, ngram: str) -> bool:
-        return next(
-            (it for it in self if it.ngram == ngram.ngram), None
-        ) is not None
+    def __contains__(self, ngram: str | NGram) -> bool:
+        if isinstance(ngram, NGram):
+            ngram = ngram.ngram
+        return self._db.exists(NGram.hash(ngram))
+
+    def _write_embeddings(self, rows: Iterable[Dict]):
+        """Upserts (ngram_id, embedding) rows, replacing existing ones"""
+        self._db_embeddings.upsert(
+            rows=rows,
+            index_elements=[NGramEmbedding.ngram_id],
+            set_=lambda excluded: dict(embedding=excluded.embedding))
 
 
 class Vocab(VocabBase):
@@ -68,24 +95,59 @@ class Vocab(VocabBase):
     def index(self) -> Iterable[int]:
         return self._db.index
 
-    def calculate_embeddings(self):
+    def add_ngrams(self, documents: Iterable[Dict[str, int]]):
+        """Adds the ngram frequencies of a batch of documents in bulk
+
+        Each distinct ngram is hashed and sent once per batch, its occurence
+        being the number of documents of the batch it appears in
+        """
+        frequencies, occurences = Counter(), Counter()
+        for ngrams in documents:
+            frequencies.update(ngrams)
+            occurences.update(ngrams.keys())
+
+        self._db.upsert(
+            rows=[dict(id=NGram.hash(ngram),
+                       ngram=ngram,
+                       frequency=frequency,
+                       occurence=occurences[ngram])
+                  for ngram, frequency in frequencies.items()],
+            index_elements=[NGram.id],
+            set_=lambda excluded: dict(
+                frequency=NGram.frequency + excluded.frequency,
+                occurence=NGram.occurence + excluded.occurence))
+
+    def calculate_embeddings(self, batch_size: int = 10_000):
         encoder: SBert = SBert()
 
-        vocab_size = len(self)
-        batch_size = 1000
-        for i in range(0, vocab_size, 1000):
-            print(f"Processing NGrams {i:_}-{i+batch_size:_}/{vocab_size:_}",
-                  end="\r")
-            ngrams = [*self[i:i + batch_size]]
-            embeddings = encoder.encode_ngrams(
-                [ngram.ngram for ngram in ngrams])
-
-            ngram_embeddings = [
-                NGramEmbedding(ngram_id=ngram.id, embedding=embedding)
-                for ngram, embedding in zip(ngrams, embeddings)]
-            self._db_embeddings.bulk_update(ngram_embeddings)
-
-            del ngrams, embeddings, ngram_embeddings
+        vocab_size, processed = len(self), 0
+        ngrams = self._db.find_after(None, batch_size)
+        # a page is written on its own thread while the next one is encoded,
+        # the writer only touches the embeddings service and its session
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            pending = None
+            # walks the keyset cursor to its end, vocab_size only feeds the
+            # progress message and may be stale if the vocab grew meanwhile
+            while ngrams:
+                print(f"Processing NGrams {processed:_}-"
+                      f"{processed + len(ngrams):_}/{vocab_size:_}",
+                      end="\r")
+                embeddings = encoder.encode_ngrams(
+                    [ngram.ngram for ngram in ngrams])
+                rows = [dict(ngram_id=ngram.id, embedding=embedding)
+                        for ngram, embedding in zip(ngrams, embeddings)]
+
+                if pending is not None:
+                    pending.result()  # one page in flight, surfaces errors
+                pending = writer.submit(self._write_embeddings, rows)
+
+                processed += len(ngrams)
+                # a short page is the last one, no need to query past it
+                ngrams = self._db.find_after(ngrams[-1].id, batch_size) \
+                    if len(ngrams) == batch_size else []
+
+            if pending is not None:
+                pending.result()
 
     def clear_vocab(self):
         self._db_embeddings.drop_table()
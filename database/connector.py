@@ -1,10 +1,10 @@
 import asyncio
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 from os import getenv
 
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, scoped_session
-from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, scoped_session
 from sqlalchemy_utils import create_database, database_exists
 
 from common.database import Base
@@ -14,27 +14,59 @@ class DriverDB:
     _instances = {}
     DB_PROTOCOL = "postgresql+psycopg2"
     ASYNC_DB_PROTOCOL = "postgresql+asyncpg"
-
-    def __new__(cls, DB_NAME=None):
-        # Implements Multition pattern
-        if DB_NAME is None:
-            raise ValueError("DB_NAME cannot be None")
-        if DB_NAME not in cls._instances:
-            cls._instances[DB_NAME] = super().__new__(cls)
-        return cls._instances[DB_NAME]
+    SESSION_CLASS = Session
+
+    # connection settings identifying an instance, with their fallbacks
+    INSTANCE_KEYS = (("DB_USER", "postgres"),
+                     ("DB_HOST", "localhost"),
+                     ("DB_PORT", "5432"),
+                     ("DB_NAME", "postgres"))
+
+    _engine = None
+    _ready = False
+
+    @staticmethod
+    def _get_val(kwargs, key, fallback):
+        return kwargs.get(key, getenv(key, fallback))
+
+    def __new__(cls, **kwargs):
+        # Implements Multition pattern, one instance (and connection pool)
+        # per user, host, port and database
+        key = tuple(cls._get_val(kwargs, key, fallback)
+                    for key, fallback in cls.INSTANCE_KEYS)
+        if key not in cls._instances:
+            cls._instances[key] = super().__new__(cls)
+        return cls._instances[key]
 
     def __init__(self, **kwargs):
+        if self._ready:
+            return
+
         def get_val(key, fallback):
-            return kwargs.get(key, getenv(key, fallback))
+            return self._get_val(kwargs, key, fallback)
 
         self.__user = get_val("DB_USER", "postgres")
         self.__password = get_val("DB_PASWORD", "postgres")
         self.__host = get_val("DB_HOST", "localhost")
         self.__port = get_val("DB_PORT", "5432")
         self.__db = get_val("DB_NAME", "postgres")
+        self.__pool_size = int(get_val("DB_POOL_SIZE", 10))
+        self.__max_overflow = int(get_val("DB_MAX_OVERFLOW", 10))
+        self.__pool_recycle = int(get_val("DB_POOL_RECYCLE", 1800))
+
+        # sqlalchemy_utils only handles sync drivers
+        url = self.engine.url.set(drivername=DriverDB.DB_PROTOCOL)
+        if not database_exists(url):
+            create_database(url)
 
-        if not database_exists(self.engine.url):
-            create_database(self.engine.url)
+        self._lock = asyncio.Lock()
+        self.session = sessionmaker(bind=self.engine,
+                                    class_=self.SESSION_CLASS,
+                                    expire_on_commit=False,
+                                    autocommit=False,
+                                    autoflush=False)
+
+        self._ready = True
 
     @property
     def db_uri(self) -> str:
@@ -47,30 +79,27 @@ class DriverDB:
             db=self.__db)
 
     @property
-    def engine(self):
-        if getattr(self, "__engine", None) is None:
-            self.__engine = create_engine(self.db_uri, poolclass=NullPool)
-        return self.__engine
+    def engine_options(self) -> dict:
+        return dict(pool_size=self.__pool_size,
+                    max_overflow=self.__max_overflow,
+                    pool_recycle=self.__pool_recycle,
+                    pool_pre_ping=True,
+                    pool_use_lifo=True)
 
     @property
-    def session(self):
-        if getattr(self, "__session", None) is None:
-            self.__session_factory = sessionmaker(bind=self.engine,
-                                                  expire_on_commit=False,
-                                                  autocommit=False,
-                                                  autoflush=False)
-
-        return self.__session_factory
+    def engine(self):
+        if self._engine is None:
+            self._engine = create_engine(self.db_uri, **self.engine_options)
+        return self._engine
 
     def create_all(self):
         Base.metadata.create_all(bind=self.engine, checkfirst=True)
 
-    async def get_session(self):
-        while self.__locked:
-            await asyncio.sleep(0.1)
-
-        self.__locked = True
-        session = scoped_session(self.session)
+    @classmethod
+    @contextmanager
+    def session_scope(cls, **kwargs):
+        """Transaction on the driver identified by kwargs"""
+        session = cls(**kwargs).session()
 
         try:
             yield session
@@ -80,5 +109,53 @@ class DriverDB:
             session.rollback()
             raise
         finally:
-            self.__locked = False
             session.close()
+
+    @asynccontextmanager
+    async def get_session(self):
+        async with self._lock:
+            session = scoped_session(self.session)
+
+            try:
+                yield session
+                session.commit()
+                session.expunge_all()
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+
+
+class AsyncDriverDB(DriverDB):
+    """asyncpg backed driver, its sessions are AsyncSession instances"""
+    _instances = {}
+    DB_PROTOCOL = DriverDB.ASYNC_DB_PROTOCOL
+    SESSION_CLASS = AsyncSession
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            self._engine = create_async_engine(
+                self.db_uri, **self.engine_options)
+        return self._engine
+
+    async def create_all(self):
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all, checkfirst=True)
+
+    @asynccontextmanager
+    async def async_session_scope(self):
+        """Transaction on this driver's AsyncSession; named apart from the
+        sync DriverDB.session_scope classmethod, which it does not replace"""
+        session = self.session()
+
+        try:
+            yield session
+            await session.commit()
+            session.expunge_all()
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
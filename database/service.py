@@ -1,12 +1,16 @@
 from collections import namedtuple
-from typing import Any, Iterable, List
+from contextlib import contextmanager
+from functools import cached_property
+from itertools import islice
+from typing import Any, AsyncGenerator, Callable, Dict, Iterable, List, Tuple
 
-from sqlalchemy import and_, delete, desc, func, select
-from sqlalchemy.orm import close_all_sessions
+from sqlalchemy import and_, bindparam, delete, desc, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, close_all_sessions
 
-from common.database.connector import DriverDB
+from common.database.connector import AsyncDriverDB, DriverDB
 from common.mixins.db import MixinORM
-from common.utils.itertools import SubscriptableGenerator
+from common.utils.itertools import SubscriptableGenerator, chunks
 
 
 class ServiceDB:
@@ -18,55 +22,119 @@ class ServiceDB:
         self.__driver = DriverDB(**kwargs)
         self.__model = orm_model
 
+        # table size, invalidated by the writes issued through this service
+        self.__len_cache = None
+        self.__session = None
+
         if not self.__driver.engine.has_table(orm_model.__tablename__):
             print("Creating table {0}".format(orm_model.__tablename__))
             self.create_table()
 
     @property
-    def session(self):
-        session = self.__driver.session()
-
+    def session(self) -> Session:
+        """Session kept for the lifetime of the service, so that its identity
+        map serves repeated lookups; every operation ends its transaction"""
+        if self.__session is None:
+            self.__session = self.__driver.session()
+        elif not self.__session.is_active:
+            self.__session.rollback()  # recover from a failed statement
+        return self.__session
+
+    @contextmanager
+    def __transaction(self, wrote: bool = False):
+        """One operation on the service session, committed afterwards so
+        that its pooled connection is not left idle in transaction
+
+        Writes issued through Core or bulk mappings bypass the identity map,
+        wrote expires it so that instances handed out earlier are reloaded
+        """
+        session = self.session
         try:
             yield session
             session.commit()
-            session.expunge_all()
         except Exception:
             session.rollback()
             raise
+
+        if wrote:
+            session.expire_all()
+
+    @property
+    def index(self) -> Iterable:
+        query = self.__stream(
+            self.__build_statement(select=self.__model.id,
+                                   order_by=self.__model.id))
+        return SubscriptableGenerator(query, lambda: len(self))
+
+    def rows(self, *options) -> Iterable[MixinORM]:
+        """Streams every row, options are loader options such as
+        selectinload(Model.relationship)"""
+        statement = self.__build_statement(select=self.__model,
+                                           order_by=self.__model.id)
+        query = self.__stream(statement.options(*options))
+        return SubscriptableGenerator(query, lambda: len(self))
+
+    def __stream(self,
+                 statement,
+                 batch_size: int = 1000,
+                 scalars: bool = True) -> Iterable:
+        """Executes statement over a server-side cursor, so that only
+        batch_size rows are held in memory at a time
+
+        The cursor lives on a session of its own, closed once the rows are
+        exhausted or the generator dropped, so that other operations of the
+        service can commit while it is being read
+        """
+        session = self.__driver.session()
+        try:
+            result = session.execute(
+                statement.execution_options(stream_results=True)
+            ).yield_per(batch_size)
+            yield from result.scalars() if scalars else result
         finally:
             session.close()
 
     def __count(self, statement) -> int:
-        return next(self.session).execute(
-            select(func.count("*")).select_from(statement)
-        ).scalar()
+        with self.__transaction() as session:
+            return session.execute(
+                select(func.count("*")).select_from(statement)
+            ).scalar()
+
+    def __len__(self) -> int:
+        if self.__len_cache is None:
+            self.__len_cache = self.len()
+        return self.__len_cache
 
     def drop_table(self):
+        self.__len_cache = None
         close_all_sessions()
         self.__model.__table__.drop(bind=self.__driver.engine, checkfirst=True)
 
     def create_table(self):
+        self.__len_cache = None
         close_all_sessions()
         self.__model.__table__.create(
             bind=self.__driver.engine, checkfirst=True)
 
     def min(self, column: str) -> Any:
-        if column not in self.__model.FIELDS:
+        if column not in self.__model.field_set:
             raise Exception("Table {0} doesn't have a {1} field".format(
                 self.__model.__tablename__, column))
 
-        return next(self.session).execute(
-            func.min(self.__model[column])
-        ).scalar()
+        with self.__transaction() as session:
+            return session.execute(
+                func.min(self.__model[column])
+            ).scalar()
 
     def max(self, column: str) -> Any:
-        if column not in self.__model.FIELDS:
+        if column not in self.__model.field_set:
             raise Exception("Table {0} doesn't have a {1} field".format(
                 self.__model.__tablename__, column))
 
-        return next(self.session).execute(
-            func.max(self.__model[column])
-        ).scalar()
+        with self.__transaction() as session:
+            return session.execute(
+                func.max(self.__model[column])
+            ).scalar()
 
     def len(self, filters: List = []):
         statement = select(self.__model)
@@ -75,57 +143,158 @@ class ServiceDB:
         return self.__count(statement)
 
     def filter_by(self, **kwargs):
-        if any([1 for key in kwargs.keys() if key not in self.__model.FIELDS]):
-            raise Exception("Table {0} doesn't have one of {1} fields".format(
-                self.__model.__tablename__, [*kwargs]))
-
-        query = next(self.session).execute(
-            self.__build_statement(
-                select=self.__model,
-                filter_by=kwargs))
-        return query
-
-    def select_columns(self, columns: Iterable[str]) -> Iterable:
+        if missing := kwargs.keys() - self.__model.field_set:
+            raise Exception("Table {0} doesn't have the {1} fields".format(
+                self.__model.__tablename__, sorted(missing)))
+
+        with self.__transaction() as session:
+            return session.execute(
+                self.__build_statement(
+                    select=self.__model,
+                    filter_by=kwargs)
+            ).all()
+
+    def select_columns(self,
+                       columns: Iterable[str],
+                       order_by: str = "id") -> Iterable:
         if isinstance(columns, str):
             columns = [columns]
 
         statement = self.__build_statement(
             select=[self.__model[column] for column in columns])
 
-        query = next(self.session).execute(
-            statement.order_by(self.__model["id"])
-        ).yield_per(1000)
+        statement = statement.order_by(self.__model[order_by])
+
+        if len(columns) == 1:
+            return SubscriptableGenerator(self.__stream(statement),
+                                          lambda: len(self))
 
         Row = namedtuple("Row", [*columns])
-        lenght = len(self)
-        return SubscriptableGenerator(
-            (Row(*row) if len(row) > 1 else row[0] for row in query),
-            lenght)
+        query = self.__stream(statement, scalars=False)
+        return SubscriptableGenerator((Row(*row) for row in query),
+                                      lambda: len(self))
+
+    def select_related(self,
+                       column: Any,
+                       order_by: str = "id") -> Iterable:
+        """Streams a column of a related model, one value per row of this
+        model in order_by order, None for rows without a related one"""
+        statement = select(column).select_from(self.__model).outerjoin(
+            column.class_).order_by(self.__model[order_by])
+
+        return SubscriptableGenerator(self.__stream(statement),
+                                      lambda: len(self))
+
+    def iter_columns(self,
+                     columns: Iterable[str],
+                     batch_size: int = 256) -> Iterable[Tuple[List, ...]]:
+        """Yields the columns in batches of batch_size rows, one list per
+        column, holding only one batch in memory at a time"""
+        statement = self.__build_statement(
+            select=[self.__model[column] for column in columns])
 
-    def bulk_update(self, items: Iterable[MixinORM]):
-        old_items = [
-            *filter(lambda it: getattr(it, "id", None) != None, items)]
-        new_items = [
-            *filter(lambda it: getattr(it, "id", None) == None, items)]
+        query = self.__stream(statement.order_by(self.__model["id"]),
+                              batch_size=batch_size,
+                              scalars=False)
+        while partition := [*islice(query, batch_size)]:
+            yield tuple(map(list, zip(*partition)))
+
+    def bulk_update(self, items: Iterable[MixinORM], batch_size: int = 1000):
+        """Inserts items without an id and updates the others, each batch
+        being sent as one executemany per statement"""
+        columns = [column.key for column in self.__model.__table__.columns]
+        new_rows, old_rows = [], []
+
+        self.__len_cache = None
+
+        with self.__transaction(wrote=True) as session:
+            def flush():
+                if new_rows:
+                    session.bulk_insert_mappings(self.__model, new_rows)
+                if old_rows:
+                    session.bulk_update_mappings(self.__model, old_rows)
+                new_rows.clear()
+                old_rows.clear()
+
+            for item in items:
+                row = {column: getattr(item, column, None)
+                       for column in columns}
+                if row.get("id") is None:
+                    row.pop("id", None)  # let the column default generate it
+                    new_rows.append(row)
+                else:
+                    old_rows.append(row)
+
+                if len(new_rows) + len(old_rows) >= batch_size:
+                    flush()
+            flush()
+
+    def upsert(self,
+               rows: List[Dict[str, Any]],
+               index_elements: List[str],
+               set_: Callable[[Any], Dict[str, Any]],
+               batch_size: int = 10_000):
+        """INSERT ... ON CONFLICT DO UPDATE, one statement per batch of rows
+
+        set_ receives the statement's `excluded` namespace and returns the
+        column values to update on conflict
+        """
+        if not rows:
+            return
 
-        session = next(self.session)
-        if new_items:
-            session.add_all(new_items)
-        if old_items:
-            session.bulk_save_objects(old_items)
+        self.__len_cache = None
 
-        session.commit()
+        with self.__transaction(wrote=True) as session:
+            for batch in chunks(rows, batch_size):
+                statement = insert(self.__model).values(batch)
+                session.execute(statement.on_conflict_do_update(
+                    index_elements=index_elements,
+                    set_=set_(statement.excluded)))
 
     def find(self, id: str | Iterable[str]) -> MixinORM:
         if isinstance(id, str):
-            return next(self.session).get(self.__model, id)
+            with self.__transaction() as session:
+                return session.get(self.__model, id)
         elif isinstance(id, Iterable):
-            return next(self.session).execute(
-                select(self.__model)
-                .where(self.__model.id.in_(id)))
+            with self.__transaction() as session:
+                return session.execute(
+                    select(self.__model)
+                    .where(self.__model.id.in_(id))).all()
         else:
             return None
 
+    def find_many(self,
+                  ids: Iterable[str],
+                  batch_size: int = 10_000) -> List[MixinORM]:
+        """Fetches rows by id with one IN (...) query per batch of ids"""
+        with self.__transaction() as session:
+            return [
+                row
+                for batch in chunks([*ids], batch_size)
+                for row in session.execute(
+                    select(self.__model).where(self.__model.id.in_(batch))
+                ).scalars()]
+
+    @cached_property
+    def __statements(self) -> Dict[str, Any]:
+        """Hot statements, built once and executed with bound parameters"""
+        def by_index(descending: bool):
+            return select(self.__model).where(
+                self.__model.id == self.__seek_id(
+                    offset=bindparam("offset"), descending=descending))
+
+        return dict(
+            exists=select(1).where(
+                self.__model.id == bindparam("id")).limit(1),
+            by_index=by_index(descending=False),
+            by_index_desc=by_index(descending=True))
+
+    def exists(self, id: int | str) -> bool:
+        with self.__transaction() as session:
+            return session.execute(
+                self.__statements["exists"], dict(id=id)
+            ).first() is not None
+
     def find_where(self,
                    filters: List = [],
                    sort: List = [],
@@ -141,68 +310,89 @@ class ServiceDB:
             sort = [self.__model.id]
         statement = statement.order_by(*sort)
 
-        if page != None and page_size != None:
+        if page is not None and page_size is not None:
             statement = statement.offset(
                 page * page_size).limit(page_size)
 
-        session = next(self.session)
-        query = session.execute(statement)
+        with self.__transaction() as session:
+            rows = session.execute(statement).scalars().all()
 
-        lenght = self.__count(statement)
-        return SubscriptableGenerator((row[0] for row in query), lenght)
+        return SubscriptableGenerator(rows, lambda: self.__count(statement))
 
     def find_by_index(self, index: int) -> MixinORM:
-        statement = self.__build_statement(
-            select=self.__model,
-            order_by=desc(self.__model.id) if index < 0 else self.__model.id,
-            offset=abs(index),
-            limit=1)
+        if index >= 0:
+            statement, offset = self.__statements["by_index"], index
+        else:
+            statement, offset = self.__statements["by_index_desc"], -index - 1
 
-        match = next(self.session).execute(statement).first()
+        with self.__transaction() as session:
+            match = session.execute(statement, dict(offset=offset)).first()
         return match[0] if match else None
 
-    def find_by_slice(self, indexer: slice) -> Iterable[MixinORM]:
-        statement0 = self.__build_statement(select=self.__model)
-
-        statement = statement0.order_by(
-            desc(self.__model.id) if (
-                indexer.step and indexer.step < 0
-            ) else self.__model.id)
+    def find_after(self, last_id: Any = None, n: int = 1000) -> List[MixinORM]:
+        """Keyset pagination, the n rows following last_id in id order
 
-        db_size = len(self)
+        Unlike OFFSET, each page costs the same however deep it is
+        """
+        statement = select(self.__model).order_by(self.__model.id).limit(n)
+        if last_id is not None:
+            statement = statement.where(self.__model.id > last_id)
 
-        if indexer.start:
-            offset = (db_size + indexer.start) % db_size
-            statement = statement.offset(offset)
+        with self.__transaction() as session:
+            return session.execute(statement).scalars().all()
 
-        if indexer.stop and indexer.stop <= db_size:
-            limit = (db_size + indexer.stop) % db_size
-            if indexer.start:
-                limit -= offset
-            statement = statement.limit(limit if limit >= 0 else 0)
+    def find_by_slice(self, indexer: slice) -> Iterable[MixinORM]:
+        # a negative step walks the table by descending id
+        descending = bool(indexer.step and indexer.step < 0)
+        start, stop, _ = slice(indexer.start, indexer.stop).indices(len(self))
+        length = max(0, stop - start)
 
-        query = next(self.session).execute(statement).yield_per(1000)
-        lenght = self.__count(statement0)
-        return SubscriptableGenerator((row[0] for row in query), lenght)
+        statement = self.__build_statement(
+            select=self.__model,
+            order_by=desc(self.__model.id) if descending else self.__model.id,
+            limit=length)
+
+        if start:
+            boundary = self.__seek_id(offset=start, descending=descending)
+            statement = statement.where(
+                self.__model.id <= boundary if descending
+                else self.__model.id >= boundary)
+
+        return SubscriptableGenerator(self.__stream(statement),
+                                      lambda: length)
+
+    def __seek_id(self, offset: int, descending: bool = False):
+        """Id of the row at offset, as a scalar subquery
+
+        The offset is walked over the primary key index alone, the rows
+        themselves are then sought by id instead of scanned and discarded
+        """
+        return self.__build_statement(
+            select=self.__model.id,
+            order_by=desc(self.__model.id) if descending else self.__model.id,
+            offset=offset,
+            limit=1).scalar_subquery()
 
     def find_by_match(self, **kwargs) -> MixinORM:
-        match = next(self.session).execute(
-            self.__build_statement(
-                select=self.__model,
-                filter_by=kwargs,
-                limit=1)
-        ).first()
+        with self.__transaction() as session:
+            match = session.execute(
+                self.__build_statement(
+                    select=self.__model,
+                    filter_by=kwargs,
+                    limit=1)
+            ).first()
         return match[0] if match else None
 
     def delete_where(self, *args):
         if not args:
             return
 
+        self.__len_cache = None
+
         statement = delete(self.__model).where(and_(*args))
 
-        session = next(self.session)
-        session.execute(statement)
-        session.commit()
+        with self.__transaction(wrote=True) as session:
+            session.execute(statement)
 
     def __build_statement(self, **kwargs):
         if "select" not in kwargs:
@@ -218,3 +408,94 @@ class ServiceDB:
                 statement = statement(stat)
 
         return statement
+
+
+class AsyncServiceDB:
+    """Read side of ServiceDB over AsyncDriverDB
+
+    Every method opens its own session so that callers on an event loop can
+    overlap queries, e.g. with asyncio.gather
+    """
+
+    def __init__(self, orm_model: MixinORM, **kwargs):
+        self.__driver = AsyncDriverDB(**kwargs)
+        self.__model = orm_model
+
+    async def __count(self, statement) -> int:
+        async with self.__driver.async_session_scope() as session:
+            return (await session.execute(
+                select(func.count("*")).select_from(statement)
+            )).scalar()
+
+    async def len(self, filters: List = []) -> int:
+        statement = select(self.__model)
+        if filters:
+            statement = statement.where(and_(*filters))
+        return await self.__count(statement)
+
+    async def index(self) -> AsyncGenerator[Any, None]:
+        async for id in self.__stream(
+                select(self.__model.id).order_by(self.__model.id)):
+            yield id
+
+    async def rows(self) -> AsyncGenerator[MixinORM, None]:
+        async for row in self.__stream(
+                select(self.__model).order_by(self.__model.id)):
+            yield row
+
+    async def find(self, id: str | Iterable[str]) -> MixinORM | List[MixinORM]:
+        async with self.__driver.async_session_scope() as session:
+            if isinstance(id, (str, int)):
+                return await session.get(self.__model, id)
+            elif isinstance(id, Iterable):
+                return (await session.execute(
+                    select(self.__model).where(self.__model.id.in_([*id]))
+                )).scalars().all()
+            else:
+                return None
+
+    def __seek_id(self, offset: int, descending: bool = False):
+        """Id of the row at offset, as a scalar subquery, see ServiceDB"""
+        return select(self.__model.id).order_by(
+            desc(self.__model.id) if descending else self.__model.id
+        ).offset(offset).limit(1).scalar_subquery()
+
+    async def find_by_index(self, index: int) -> MixinORM:
+        seek_id = self.__seek_id(offset=index if index >= 0 else -index - 1,
+                                 descending=index < 0)
+
+        async with self.__driver.async_session_scope() as session:
+            return (await session.execute(
+                select(self.__model).where(self.__model.id == seek_id)
+            )).scalars().first()
+
+    async def find_by_slice(self, indexer: slice) -> List[MixinORM]:
+        # as in ServiceDB, a negative step walks the table by descending id
+        descending = bool(indexer.step and indexer.step < 0)
+        start, stop, _ = slice(indexer.start, indexer.stop).indices(
+            await self.len())
+
+        statement = select(self.__model).order_by(
+            desc(self.__model.id) if descending else self.__model.id
+        ).limit(max(0, stop - start))
+
+        if start:
+            boundary = self.__seek_id(offset=start, descending=descending)
+            statement = statement.where(
+                self.__model.id <= boundary if descending
+                else self.__model.id >= boundary)
+
+        async with self.__driver.async_session_scope() as session:
+            return (await session.execute(statement)).scalars().all()
+
+    async def find_by_match(self, **kwargs) -> MixinORM:
+        async with self.__driver.async_session_scope() as session:
+            return (await session.execute(
+                select(self.__model).filter_by(**kwargs).limit(1)
+            )).scalars().first()
+
+    async def __stream(self, statement) -> AsyncGenerator[Any, None]:
+        async with self.__driver.async_session_scope() as session:
+            result = await session.stream(statement)
+            async for item in result.scalars():
+                yield item
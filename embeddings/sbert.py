@@ -1,42 +1,154 @@
+import hashlib
 import pickle
+import sqlite3
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import Generator, Iterable
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Generator, Iterable, List
 
+import numpy as np
+import torch
 from sentence_transformers import SentenceTransformer
 
+from ..utils.itertools import chunks
 from ..utils.text import split_sentences
 
+CACHE_PATH = Path.home().joinpath(".cache", "common", "sbert.sqlite3")
+
+
+@lru_cache(maxsize=4)
+def get_transformer(model_name: str) -> SentenceTransformer:
+    """Loads a model once per process, SBert.clear_memory releases them"""
+    return SentenceTransformer(model_name)
+
 
 @dataclass
 class SBert:
     model_name: str
     embeddings: list = field(default_factory=list)
-
-    def __init__(self, model_name: str = "sentence-transformers/allenai-specter"):
+    cache_path: str = None
+
+    def __init__(self,
+                 model_name: str = "sentence-transformers/allenai-specter",
+                 cache_path: str | None = CACHE_PATH):
+        """SentenceTransformer wrapper
+
+        Keyword arguments:
+        model_name (str) -- the SentenceTransformer model to encode with
+        cache_path (str | None) -- SQLite file where embeddings are cached by
+            (model_name, text), None disables the cache
+        """
         self.model_name = model_name
         self.embeddings = []
+        self.cache_path = cache_path
 
     def encode_documents(self, corpus: Iterable[str]) -> Generator[Iterable[float], None, None]:
-        transformer = SentenceTransformer(self.model_name)
-
-        size = len(corpus)
-        for index, document in enumerate(corpus):
-            print(f"Processing embedding for document {index + 1}/{size}",
-                  end="\r")
-            yield [*transformer.encode(split_sentences(document)).mean(axis=0)]
-
-        del transformer
-        SBert.clear_memory()
+        yield from self.__cached_encode(
+            [*corpus], self.__encode_documents).tolist()
 
     def encode_ngrams(self, ngrams: Iterable[str]) -> Generator[Iterable[float], None, None]:
-        transformer = SentenceTransformer(self.model_name)
-
-        embeddings = transformer.encode(ngrams).tolist()
-        while embeddings:
-            yield embeddings.pop(0)
-
-        del transformer
-        SBert.clear_memory()
+        yield from self.__cached_encode(
+            [*ngrams], self.__encode_ngrams).tolist()
+
+    def __encode_documents(self, corpus: List[str]) -> np.ndarray:
+        transformer = get_transformer(self.model_name)
+
+        sentences, counts = [], []
+        for document in corpus:
+            document_sentences = split_sentences(document)
+            sentences.extend(document_sentences)
+            counts.append(len(document_sentences))
+
+        dimension = transformer.get_sentence_embedding_dimension()
+        if sentences:
+            # keep sentence embeddings on the transformer's device until
+            # they are reduced to one mean vector per document
+            embeddings = transformer.encode(sentences,
+                                            batch_size=64,
+                                            show_progress_bar=False,
+                                            convert_to_tensor=True)
+        else:
+            embeddings = torch.empty((0, dimension),
+                                     device=transformer.device)
+
+        counts = torch.tensor(counts, device=embeddings.device)
+        segments = torch.repeat_interleave(
+            torch.arange(len(counts), device=embeddings.device), counts)
+        sums = torch.zeros((len(counts), dimension),
+                           dtype=embeddings.dtype,
+                           device=embeddings.device
+                           ).index_add_(0, segments, embeddings)
+
+        # documents without sentences get a NaN embedding (0 / 0) as before
+        means = (sums / counts[:, None]).cpu().numpy()
+
+        del embeddings, sums
+
+        return means
+
+    def __encode_ngrams(self, ngrams: List[str]) -> np.ndarray:
+        transformer = get_transformer(self.model_name)
+
+        # ngrams repeat a lot, encode each distinct one once and scatter back
+        unique, inverse = np.unique(np.asarray(ngrams, dtype=str),
+                                    return_inverse=True)
+        embeddings = transformer.encode(unique.tolist(),
+                                        batch_size=128,
+                                        show_progress_bar=False,
+                                        convert_to_numpy=True)
+
+        return embeddings[inverse]
+
+    def __cache_key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).digest()
+
+    @contextmanager
+    def __cache(self):
+        path = Path(self.cache_path).resolve()
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        connection = sqlite3.connect(path)
+        try:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key BLOB PRIMARY KEY, dim INT, vec BLOB)")
+            yield connection
+            connection.commit()
+        finally:
+            connection.close()
+
+    def __cached_encode(self,
+                        texts: List[str],
+                        encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Encodes only the texts missing from the cache, keeping input order"""
+        if not self.cache_path:
+            return np.asarray(encode(texts), dtype=np.float32)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        keys = [self.__cache_key(text) for text in texts]
+
+        with self.__cache() as cache:
+            hits = {}
+            for chunk in chunks(keys, 900):  # SQLite bound variables limit
+                hits.update(cache.execute(
+                    "SELECT key, vec FROM cache WHERE key IN ({0})".format(
+                        ",".join("?" * len(chunk))),
+                    chunk).fetchall())
+
+            misses = [*{key: index for index, key in enumerate(keys)
+                        if key not in hits}.items()]
+            if misses:
+                encoded = np.asarray(encode([texts[i] for _, i in misses]),
+                                     dtype="<f4")
+                rows = [(key, vec.shape[0], vec.tobytes())
+                        for (key, _), vec in zip(misses, encoded)]
+                cache.executemany(
+                    "INSERT OR IGNORE INTO cache VALUES (?, ?, ?)", rows)
+                hits.update((key, vec) for key, _, vec in rows)
+
+        return np.stack([np.frombuffer(hits[key], dtype="<f4") for key in keys])
 
     @classmethod
     def load(cls, path: str):
@@ -48,6 +160,7 @@ class SBert:
 
         from torch.cuda import empty_cache, ipc_collect
 
+        get_transformer.cache_clear()
         collect()
         ipc_collect()
         empty_cache()
@@ -1,10 +1,24 @@
-import json
 from datetime import date, datetime
 from pathlib import Path
+import json
+import re
 from typing import Any, Dict
 
 import brotli
 
+try:
+    import orjson as _json
+except ImportError:
+    _json = json
+
+# integer literals that may not fit in 64 bits, which orjson reads as floats
+WIDE_INTEGER_RE = re.compile(rb"(?<![\d.])\d{19,}(?![\d.eE])")
+
+# size of the slices fed to the brotli compressor
+CHUNK_SIZE = 1 << 20
+# the default (11) is ~100x slower for a few percent smaller output
+BROTLI_QUALITY = 4
+
 
 def defaut_json_serializer(obj: object) -> object:
     """JSON serializer for objects not serializable by default json code"""
@@ -15,27 +29,57 @@ def defaut_json_serializer(obj: object) -> object:
         return str(obj)
 
 
+def dump_json(obj: Any) -> bytes:
+    """obj as UTF-8 JSON, with orjson when it can serialize it
+
+    orjson rejects what the stdlib accepts, such as integers beyond 64
+    bits, those objects fall back to the stdlib json
+    """
+    if _json is not json:
+        try:
+            return _json.dumps(obj,
+                               default=defaut_json_serializer,
+                               option=_json.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(obj, default=defaut_json_serializer).encode("utf-8")
+
+
+def parse_json(data: bytes) -> Any:
+    """Parses data with orjson when it reads it losslessly, with the stdlib
+    json otherwise, so that what dump_json wrote with either round-trips
+
+    orjson turns integers beyond 64 bits into floats and rejects NaN and
+    Infinity, both written by the stdlib json
+    """
+    if _json is not json and not WIDE_INTEGER_RE.search(data):
+        try:
+            return _json.loads(data)
+        except _json.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
 def load_json(path: str) -> Dict:
-    try:
-        path = Path(path).resolve()
-        with open(path, "rb") as jsonFile:
-            decompressed = brotli.decompress(jsonFile.read().decode('utf-8'))
-            obj = json.load(decompressed)
-    except:
-        obj = None
-    finally:
-        return obj
+    path = Path(path).resolve()
+    with open(path, "rb") as jsonFile:
+        return parse_json(brotli.decompress(jsonFile.read()))
 
 
 def save_json(path: str, obj: Any) -> Dict:
-    try:
-        path = Path(path).resolve()
-        with open(path, "wb") as jsonFile:
-            compressed = brotli.compress(json.dumps(
-                obj, default=defaut_json_serializer
-            ).encode("utf-8"))
-            jsonFile.write(compressed)
-    except:
-        obj = None
-    finally:
-        return obj
+    data = dump_json(obj)
+
+    path = Path(path).resolve()
+    with open(path, "wb") as jsonFile:
+        if len(data) <= CHUNK_SIZE:
+            jsonFile.write(brotli.compress(
+                data, quality=BROTLI_QUALITY, mode=brotli.MODE_TEXT))
+        else:
+            compressor = brotli.Compressor(quality=BROTLI_QUALITY,
+                                           mode=brotli.MODE_TEXT)
+            view = memoryview(data)
+            for i in range(0, len(view), CHUNK_SIZE):
+                jsonFile.write(compressor.process(view[i:i + CHUNK_SIZE]))
+            jsonFile.write(compressor.finish())
+
+    return obj
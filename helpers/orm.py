@@ -1,10 +1,11 @@
+import warnings
 from contextlib import contextmanager
+from functools import lru_cache
 from os import getenv
 from typing import Callable
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import registry, sessionmaker
-from sqlalchemy.pool import NullPool
 
 from sqlalchemy_utils import database_exists, create_database
 
@@ -13,6 +14,9 @@ Base = MapperRegistry.generate_base()
 
 
 class DriverDB:
+    _engine = None
+    _session = None
+
     def __init__(self, **kwargs):
         def get_val(key, fallback):
             return kwargs.get(key, getenv(key, fallback))
@@ -22,6 +26,9 @@ class DriverDB:
         self.__host = get_val("DB_HOST", "localhost")
         self.__port = get_val("DB_PORT", "5432")
         self.__db = get_val("DB_NAME", "postgres")
+        self.__pool_size = int(get_val("DB_POOL_SIZE", 10))
+        self.__max_overflow = int(get_val("DB_MAX_OVERFLOW", 10))
+        self.__pool_recycle = int(get_val("DB_POOL_RECYCLE", 1800))
 
         if not database_exists(self.engine.url):
             create_database(self.engine.url)
@@ -37,17 +44,22 @@ class DriverDB:
 
     @property
     def engine(self):
-        if getattr(self, "__engine", None) is None:
-            self.__engine = create_engine(self.db_uri, poolclass=NullPool)
-        return self.__engine
+        if self._engine is None:
+            self._engine = create_engine(self.db_uri,
+                                         pool_size=self.__pool_size,
+                                         max_overflow=self.__max_overflow,
+                                         pool_recycle=self.__pool_recycle,
+                                         pool_pre_ping=True,
+                                         pool_use_lifo=True)
+        return self._engine
 
     @property
     def session(self):
-        if getattr(self, "__session", None) is None:
-            self.__session = sessionmaker(bind=self.engine,
-                                          expire_on_commit=False,
-                                          autoflush=True)
-        return self.__session
+        if self._session is None:
+            self._session = sessionmaker(bind=self.engine,
+                                         expire_on_commit=False,
+                                         autoflush=True)
+        return self._session
 
     def create_all(self):
         Base.metadata.create_all(bind=self.engine)
@@ -73,11 +85,46 @@ class DriverDB:
         return inner
 
 
-driver: DriverDB = DriverDB()
+# created on first use rather than at import, so importing this module
+# neither connects to the database nor shares a connection across forks
+@lru_cache(maxsize=1)
+def get_driver() -> DriverDB:
+    return DriverDB()
+
+
+def get_engine():
+    return get_driver().engine
+
+
+def get_session_factory():
+    return get_driver().session
+
+
+def init_schema():
+    get_driver().create_all()
+
+
+@contextmanager
+def session_scope():
+    with get_driver().session_scope() as session:
+        yield session
+
+
+# the former import-time exports, resolved on first access for callers that
+# still import them; the schema is created then, as it was at import
+DEPRECATED_EXPORTS = {
+    "driver": get_driver,
+    "Session": get_session_factory,
+    "Engine": get_engine}
+
 
-# exports
-session_scope = driver.session_scope
-Session = driver.session
-Engine = driver.engine
+def __getattr__(name: str):
+    if name not in DEPRECATED_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-driver.create_all()
+    warnings.warn(f"helpers.orm.{name} is deprecated, use "
+                  f"{DEPRECATED_EXPORTS[name].__name__}() and init_schema()",
+                  DeprecationWarning,
+                  stacklevel=2)
+    init_schema()
+    return DEPRECATED_EXPORTS[name]()
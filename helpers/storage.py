@@ -1,3 +1,4 @@
+import os
 from abc import ABC
 from pathlib import Path
 from typing import Generic, Iterable, List, TypeVar
@@ -12,6 +13,8 @@ class ResourcesManager(Generic[T]):
                 *path if isinstance(path, Iterable) else dir
             ).resolve()
             self.resource_path.mkdir(parents=True, exist_ok=True)
+            # plain string concatenation, Path.joinpath reparses on every id
+            self.__prefix = str(self.resource_path) + os.sep
 
         self.__db: bool = db
 
@@ -22,5 +25,14 @@ class ResourcesManager(Generic[T]):
     def get_id(self, id: int | str) -> int | str:
         return int(id) if self.is_db else self.__resolve_path(id)
 
+    def get_ids(self, ids: Iterable[int | str]) -> List[int | str]:
+        if self.is_db:
+            return [int(id) for id in ids]
+        return self.resolve_many(ids)
+
+    def resolve_many(self, ids: Iterable[int | str]) -> List[str]:
+        prefix = self.__prefix
+        return [f"{prefix}{id}.json" for id in ids]
+
     def __resolve_path(self, id: int | str) -> str:
-        return self.resource_path.joinpath(f"{id}.json")
+        return f"{self.__prefix}{id}.json"
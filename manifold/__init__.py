@@ -1,15 +1,24 @@
 from __future__ import annotations
 
+import hashlib
+import weakref
 from abc import ABC, abstractmethod
-from typing import Any, Iterable
+from collections import OrderedDict
+from typing import Any, Iterable, Tuple
 
 import numpy as np
 
+# kNN graphs of the last data sets searched, shared by all manifolds so that
+# e.g. a 2D and a 3D UMAP of the same data search it once; see Manifold.knn
+KNN_CACHE_SIZE = 2
+_KNN_CACHE = OrderedDict()
+
 
 class Manifold(ABC):
     def __init__(self, n_components: int = 2, **kwargs):
         self._embedding = None
         self._params = dict(n_components=n_components, **kwargs)
+        self._applied = {}  # params last set on the model
         self.update_params(**kwargs)
 
     @property
@@ -18,9 +27,7 @@ class Manifold(ABC):
 
     def __getitem__(self, indexer) -> Any:
         return self._embedding[indexer] if (
-            isinstance(
-                self.embedding, Iterable
-            ) and np.size(self.embedding) > 0
+            self._embedding is not None and len(self._embedding) > 0
         ) else None
 
     @abstractmethod
@@ -31,16 +38,72 @@ class Manifold(ABC):
     def transform(self, X: Iterable, **kwargs) -> Iterable:
         pass
 
+    @staticmethod
+    def _coerce(X: Iterable) -> np.ndarray:
+        """X as a contiguous float32 array, without copying it if it already
+        is one"""
+        if not isinstance(X, np.ndarray):
+            X = [*X]
+        return np.ascontiguousarray(X, dtype=np.float32)
+
     def fit_transform(self, X: Iterable, **kwargs) -> Iterable:
-        X = [*X]
+        X = self._coerce(X)
         self.fit(X, **kwargs)
         return self.transform(X, **kwargs)
 
+    @staticmethod
+    def knn(X: Iterable, n_neighbors: int, metric: str) -> Tuple:
+        """Approximate kNN graph of X as (indices, distances, index), reused
+        by every manifold fitted on the same data and parameters
+
+        Data is recognized by its shape and a hash of its content, so that
+        an array mutated in place is searched again. The cache holds the
+        index, which references the data, only weakly: it lives as long as
+        a model using it, and is searched again once none does
+        """
+        X = Manifold._coerce(X)
+        key = (X.shape,
+               hashlib.blake2b(X.data, digest_size=16).digest(),
+               n_neighbors,
+               metric)
+        if key in _KNN_CACHE:
+            indices, distances, index = _KNN_CACHE[key]
+            if (index := index()) is not None:
+                _KNN_CACHE.move_to_end(key)
+                return indices, distances, index
+
+        from pynndescent import NNDescent
+
+        index = NNDescent(X, n_neighbors=n_neighbors, metric=metric, n_jobs=-1)
+        indices, distances = index.neighbor_graph
+
+        _KNN_CACHE[key] = (indices, distances, weakref.ref(index))
+        _KNN_CACHE.move_to_end(key)
+        while len(_KNN_CACHE) > KNN_CACHE_SIZE:
+            _KNN_CACHE.popitem(last=False)
+
+        return indices, distances, index
+
     def update_params(self, **kwargs):
         self._params.update(kwargs)
-        for key, value in self._params.items():
-            if hasattr(self._model, key):
-                setattr(self._model, key, value)
+        changed = {
+            key: value for key, value in self._params.items()
+            if (key not in self._applied
+                or not self.__same_param(self._applied[key], value))
+            and hasattr(self._model, key)}
+        for key, value in changed.items():
+            setattr(self._model, key, value)
+        self._applied.update(changed)
+
+    @staticmethod
+    def __same_param(old: Any, new: Any) -> bool:
+        """Equality of parameter values, arrays compared element-wise"""
+        if isinstance(old, np.ndarray) or isinstance(new, np.ndarray):
+            return np.array_equal(old, new)
+        try:
+            return bool(old == new)
+        except (TypeError, ValueError):  # e.g. containers of arrays
+            return old is new
 
     def __len__(self) -> int:
-        return len(self._embedding) if self._embedding else 0
+        return 0 if self._embedding is None else len(self._embedding)
@@ -20,11 +20,13 @@ class TSNE(Manifold):
 
     def fit(self, X: Iterable, **kwargs) -> Manifold:
         self.update_params(**kwargs)
-        self._model.fit([*X])
+        X = self._coerce(X)
+        self._model.fit(X)
 
         return self
 
     def transform(self, X: Iterable, **kwargs) -> Iterable:
         self.update_params(**kwargs)
-        self._embedding = self._model.transform([*X])
+        X = self._coerce(X)
+        self._embedding = self._model.transform(X)
         return self._embedding
@@ -2,7 +2,13 @@ from typing import Iterable
 
 from ..manifold import Manifold
 
-import umap
+try:
+    # GPU implementation, same API as umap-learn's
+    from cuml.manifold import UMAP as _UMAP
+    GPU = True
+except ImportError:
+    from umap import UMAP as _UMAP
+    GPU = False
 
 
 class UMAP(Manifold):
@@ -15,17 +21,25 @@ class UMAP(Manifold):
             metric="cosine")
         params.update(kwargs)
 
-        self._model = umap.UMAP(**params)
+        if GPU:
+            params.pop("n_jobs", None)  # cuML runs on the GPU
+
+        self._model = _UMAP(**params)
 
         super(UMAP, self).__init__(**params)
 
     def fit(self, X: Iterable, **kwargs) -> Manifold:
         self.update_params(**kwargs)
-        self._model.fit([*X])
+        X = self._coerce(X)
+        if not GPU:
+            self._model.precomputed_knn = self.knn(
+                X, self._model.n_neighbors, self._model.metric)
+        self._model.fit(X)
 
         return self
 
     def transform(self, X: Iterable, **kwargs) -> Iterable:
         self.update_params(**kwargs)
-        self._embedding = self._model.transform([*X])
+        X = self._coerce(X)
+        self._embedding = self._model.transform(X)
         return self._embedding
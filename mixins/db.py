@@ -2,11 +2,14 @@ from __future__ import annotations
 
 import hashlib
 from abc import abstractmethod
-from typing import Any, Dict, Iterable
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, Tuple
 
 from sqlalchemy import update
 
 from common.database.connector import DriverDB
+from common.utils.classes import class_property
+from common.utils.itertools import chunks
 
 
 class MixinORM:
@@ -15,9 +18,16 @@ class MixinORM:
     # triggering an expired load
     __mapper_args__ = {"eager_defaults": True}
 
+    @class_property
+    def field_set(cls) -> FrozenSet[str]:
+        """FIELDS as a frozenset, built once per model, for membership tests"""
+        if "_field_set" not in cls.__dict__:
+            cls._field_set = frozenset(cls.FIELDS)
+        return cls._field_set
+
     @classmethod
     def __class_getitem__(cls, indexer: str):
-        if indexer not in cls.FIELDS:
+        if indexer not in cls.field_set:
             raise ValueError(f"Indexer {indexer} is not a valid column")
         return getattr(cls, indexer)
 
@@ -41,19 +51,37 @@ class MixinORM:
                 .where(self.__class__.id == self.id)
                 .values(**new_values))
 
+    @classmethod
+    def bulk_update(cls,
+                    mappings: Iterable[Tuple[Any, Dict]],
+                    batch_size: int = 1000,
+                    **kwargs):
+        """Updates many rows, given as (id, new_values) pairs, with one
+        executemany UPDATE per batch in a single transaction"""
+        with DriverDB.session_scope(**kwargs) as s:
+            for batch in chunks([dict(values, id=id)
+                                 for id, values in mappings], batch_size):
+                s.bulk_update_mappings(cls, batch)
+
     def diff(self, other: MixinORM) -> Dict[str, Any]:
+        # plain attribute reads, the keys come from FIELDS so __getitem__'s
+        # checks are redundant; asdict would deep copy the relationships
         return {
-            key: other[key] for key in self.FIELDS
-            if key != "id" and other[key] != self[key]}
+            key: value for key in self.FIELDS
+            if key != "id"
+            and (value := getattr(other, key)) != getattr(self, key)}
 
     def __getitem__(self, index: str) -> Any:
-        if isinstance(index, str) and index in self.FIELDS:
+        if isinstance(index, str) and index in self.field_set:
             return getattr(self, index)
         return None
 
-    @classmethod
-    def hash(cls, data: str) -> str:
-        return hashlib.md5(data.encode("utf-8")).hexdigest()
+    @staticmethod
+    @lru_cache(maxsize=8192)
+    def hash(data: str) -> str:
+        # md5 hex digests are the stored ids (String(32)) of existing rows
+        return hashlib.md5(data.encode("utf-8"),
+                           usedforsecurity=False).hexdigest()
 
 
 class MultitonMixin:
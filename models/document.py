@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import asdict, dataclass, field
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import ClassVar, Dict, List
 
@@ -10,7 +10,7 @@ from sqlalchemy.orm import Mapped, relationship
 from ..database import MapperRegistry
 from ..mixins.db import MixinORM
 from .types.dictionary import Dictionary
-from .types.embedding import Embedding
+from .types.embedding import HalfEmbedding
 
 DOCUMENT_TABLE = "documents"
 
@@ -40,11 +40,15 @@ class DocumentEmbedding(MixinORM):
     document: Mapped["Document"] = field(
         init=False,
         metadata={"sa": relationship("Document", back_populates="embedding")})
-    embedding: Embedding = field(
-        metadata={"sa": Column(Embedding, nullable=False)})
+    embedding: HalfEmbedding = field(
+        metadata={"sa": Column(HalfEmbedding, nullable=False)})
+
+    FIELDS: ClassVar[List[str]] = ["id", "document_id", "embedding"]
 
     def as_dict(self) -> Dict:
-        return asdict(self)
+        return dict(id=self.id,
+                    document_id=self.document_id,
+                    embedding=self.embedding)
 
 
 @MapperRegistry.mapped
@@ -94,6 +98,9 @@ class Document(MixinORM):
     def __eq__(self, document: Document) -> bool:
         return document and document.id == self.id
 
+    def __hash__(self) -> int:
+        return hash(self.id)
+
     def as_dict(self, metadata=False) -> Dict:
         ignore = ["embedding"]
         if metadata:
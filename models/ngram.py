@@ -1,12 +1,12 @@
 from __future__ import annotations
 
-from dataclasses import asdict, dataclass, field
+from dataclasses import dataclass, field
 from typing import ClassVar, Dict, List
 
 from sqlalchemy import Column, ForeignKey, Integer, String
 from sqlalchemy.orm import Mapped, relationship
 
-from common.models.types.embedding import Embedding
+from common.models.types.embedding import HalfEmbedding
 
 from ..database import MapperRegistry
 from ..mixins.db import MixinORM
@@ -39,11 +39,15 @@ class NGramEmbedding(MixinORM):
     ngram: Mapped["NGram"] = field(
         init=False,
         metadata={"sa": relationship("NGram", back_populates="embedding")})
-    embedding: Embedding = field(
-        metadata={"sa": Column(Embedding, nullable=False)})
+    embedding: HalfEmbedding = field(
+        metadata={"sa": Column(HalfEmbedding, nullable=False)})
+
+    FIELDS: ClassVar[List[str]] = ["id", "ngram_id", "embedding"]
 
     def as_dict(self) -> Dict:
-        return asdict(self)
+        return dict(id=self.id,
+                    ngram_id=self.ngram_id,
+                    embedding=self.embedding)
 
 
 @MapperRegistry.mapped
@@ -76,8 +80,12 @@ class NGram(MixinORM):
     def __eq__(self, ngram: NGram) -> bool:
         return ngram and ngram.ngram == self.ngram
 
+    def __hash__(self) -> int:
+        return hash(self.ngram)
+
     def as_dict(self) -> Dict:
-        obj = asdict(self)
+        obj = {field: getattr(self, field)
+               for field in self.FIELDS if field != "embedding"}
         obj["embedding"] = self.embedding.embedding if self.embedding else None
         return obj
 
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Any, ClassVar, Dict, List
+from typing import Any, ClassVar, Dict, FrozenSet, List
 
 from sqlalchemy import JSON, Column, String, select
+from sqlalchemy.dialects.postgresql import insert
 
 from ..database import MapperRegistry
 from ..database.connector import DriverDB
@@ -24,6 +25,7 @@ class Settings(MixinORM):
     DEFAULTS: ClassVar[Dict[str, Any]] = {
         "last_document_processed": 0,
     }
+    KEYS: ClassVar[FrozenSet[str]] = frozenset(DEFAULTS)
 
     @classmethod
     def reset_defaults(cls, **kwargs):
@@ -38,24 +40,28 @@ class Settings(MixinORM):
                     for key, value in cls.DEFAULTS.items()])
 
     @classmethod
-    def get(cls, key: str, **kwargs):
-        if key not in cls.DEFAULTS.keys():
-            raise ValueError(f"Key {key} is not a valid setting key")
+    def get(cls, key: str, **kwargs) -> Settings:
+        cls.__check_key(key)
 
         with DriverDB.session_scope(**kwargs) as session:
-            return session.get(cls, key)
+            item = session.get(cls, key)
+        return item if item else cls(key=key, value=cls.DEFAULTS[key])
 
     @classmethod
     def set(cls, key: str, value: Any, **kwargs):
-        if key not in cls.DEFAULTS.keys():
-            raise ValueError(f"Key {key} is not a valid setting key")
+        cls.__check_key(key)
 
+        # single round-trip upsert instead of a get followed by a write
+        statement = insert(cls).values(key=key, value=value)
         with DriverDB.session_scope(**kwargs) as session:
-            item = session.get(cls, key)
-            if not item:
-                session.add(cls(key=key, value=value))
-            else:
-                item.value = value
+            session.execute(statement.on_conflict_do_update(
+                index_elements=[cls.key],
+                set_=dict(value=statement.excluded.value)))
+
+    @classmethod
+    def __check_key(cls, key: str):
+        if key not in cls.KEYS:
+            raise ValueError(f"Key {key} is not a valid setting key")
 
 
 # Base.metadata.create_all(Engine)
@@ -1,11 +1,40 @@
 import gzip
-import json
+import threading
 from typing import Dict, Iterable
 
 from sqlalchemy.types import LargeBinary, TypeDecorator
 
 from ...utils.miscellaneous import are_instances
 
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# zstandard's (de)compressors must not be shared across threads, each
+# thread binding or reading the column builds its own on first use
+_ZSTD = threading.local()
+
+
+def zstd_compressor():
+    if not hasattr(_ZSTD, "compressor"):
+        _ZSTD.compressor = zstandard.ZstdCompressor(level=3)
+    return _ZSTD.compressor
+
+
+def zstd_decompressor():
+    if not hasattr(_ZSTD, "decompressor"):
+        _ZSTD.decompressor = zstandard.ZstdDecompressor()
+    return _ZSTD.decompressor
+
+# rows written before zstd was available are gzip members
+GZIP_MAGIC = b"\x1f\x8b"
+
 
 class Dictionary(TypeDecorator):
     cache_ok = True
@@ -22,12 +51,19 @@ class Dictionary(TypeDecorator):
         if not are_instances(value.values(), int):
             raise TypeError("Dict values must be integers")
 
-        return gzip.compress(json.dumps(value).encode("utf-8"))
+        data = _json.dumps(value)
+        if isinstance(data, str):  # stdlib json
+            data = data.encode("utf-8")
+        if zstandard is None:
+            return gzip.compress(data)
+        return zstd_compressor().compress(data)
 
     def process_result_value(self, value: bytes, dialec) -> Iterable[float]:
         if value is None:
             return None
-        return json.loads(gzip.decompress(value))
+        if value[:2] == GZIP_MAGIC:
+            return _json.loads(gzip.decompress(value))
+        return _json.loads(zstd_decompressor().decompress(value))
 
     def copy(self, **kwargs):
         return self.__class__(self.impl.length)
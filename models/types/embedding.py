@@ -1,7 +1,6 @@
-from numbers import Number
-from struct import pack, unpack
 from typing import Iterable
 
+import numpy as np
 from sqlalchemy.types import LargeBinary, TypeDecorator
 
 
@@ -9,22 +8,46 @@ class Embedding(TypeDecorator):
     cache_ok = True
     impl = LargeBinary
 
+    # little-endian numpy dtype of each stored item
+    DTYPE = np.dtype("<f4")
+    # prefix telling DTYPE values apart from float32 rows without one
+    HEADER = b""
+
     def process_bind_param(self, value: Iterable[float], dialec) -> bytes:
         if value is None:
             return None
 
         if not isinstance(value, Iterable) or isinstance(value, str):
             raise TypeError("Value must be an iterable of floats")
-        if any(not isinstance(i, Number) for i in value):
+
+        try:
+            array = np.asarray(value, dtype=self.DTYPE)
+        except (TypeError, ValueError):
             raise TypeError("List items must be numbers (integer or float)")
+        if array.ndim != 1:
+            raise TypeError("Value must be a flat iterable of floats")
 
-        lst = [float(item) for item in value]
-        return pack(f"{len(lst)}f", *lst)
+        return self.HEADER + array.tobytes()
 
     def process_result_value(self, value: bytes, dialec) -> Iterable[float]:
         if value is None:
             return None
-        return [*unpack(f"{int(len(value)/4)}f", value)]
+        if value[:len(self.HEADER)] == self.HEADER:
+            return np.frombuffer(value,
+                                 dtype=self.DTYPE,
+                                 offset=len(self.HEADER)).tolist()
+        return np.frombuffer(value, dtype=Embedding.DTYPE).tolist()
 
     def copy(self, **kwargs):
         return self.__class__(self.impl.length)
+
+
+class HalfEmbedding(Embedding):
+    """Embedding stored as float16, half the size of float32 at a precision
+    loss negligible for cosine similarity between sentence embeddings
+
+    Rows stored as float32 before the switch are still read as such, the
+    float16 ones start with a float32 NaN no encoder emits
+    """
+    DTYPE = np.dtype("<f2")
+    HEADER = b"\xf1\x6e\xa1\x7f"
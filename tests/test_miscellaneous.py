@@ -0,0 +1,24 @@
+import importlib.util
+from pathlib import Path
+
+# loaded from its file, importing the package would bootstrap requirements
+spec = importlib.util.spec_from_file_location(
+    "miscellaneous",
+    Path(__file__).resolve().parents[1].joinpath("utils", "miscellaneous.py"))
+miscellaneous = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(miscellaneous)
+
+
+def test_count_dictionary_counts_keys_of_mappings():
+    counts = miscellaneous.count_dictionary([{"a": 5, "b": 2}, {"a": 3}])
+    assert counts == {"a": 2, "b": 1}
+
+
+def test_count_dictionary_ignores_mapping_values():
+    assert miscellaneous.count_dictionary([{"x": 0}]) == {"x": 1}
+
+
+def test_count_dictionary_sorts_and_truncates():
+    counts = miscellaneous.count_dictionary(
+        [["a", "b"], ["b", "c"], ["b"]], reversed=True, n=2)
+    assert [*counts.items()] == [("b", 3), ("a", 1)]
@@ -7,7 +7,9 @@ from typing import Iterable
 
 def batch_processing(fn: Callable, data: list, **kwargs) -> list:
     n_jobs = kwargs.get("n_jobs", cpu_count() - 1)
-    return Parallel(n_jobs=n_jobs, backend="multiprocessing")(
+    # loky memory-maps array arguments above max_nbytes instead of
+    # pickling them to every worker
+    return Parallel(n_jobs=n_jobs, backend="loky", max_nbytes="1M")(
         delayed(fn)(data=i, **kwargs) for i in data)
 
 
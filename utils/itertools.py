@@ -1,62 +1,84 @@
 from __future__ import annotations
 
 from itertools import islice, tee
-from typing import Any, Generator, Iterable, List
+from typing import Any, Callable, Generator, Iterable, List
 from numpy.random import RandomState
 
 
 class SubscriptableGenerator:
-    def __init__(self, it: Iterable[Any], lenght: int = None):
+    def __init__(self, it: Iterable[Any], length: Callable[[], int] = None):
+        """Iterable wrapper supporting indexing and len()
+
+        length is called at most once, on the first len() request, so
+        callers that only iterate never pay for it. Items read to serve an
+        index or a membership test are kept in a buffer, which only grows
+        as far as needed; negative indexes, slices and len() without length
+        read the whole stream. Iterating yields the buffer, then streams the
+        rest without keeping it
+        """
         self.__iterable = iter(it)
+        self.__items = []
+        self.__exhausted = False
 
-        self.__len = lenght
+        self.__length = length
+        self.__len = None
 
     def __iter__(self) -> Generator:
+        yield from self.__items
         for i in self.__iterable:
             yield i
 
     def __aiter__(self) -> Generator:
+        yield from self.__items
         for i in self.__iterable:
             yield i
 
     def __getitem__(self, indexer: int | slice) -> Any | Iterable[Any]:
         if isinstance(indexer, int):
-            if indexer >= len(self):
-                raise IndexError(f"Generator index {indexer} is out of range")
-
-            index = (len(self) + indexer) % len(self)
-            return next(islice(self.__copy(), index, len(self)))
+            try:
+                if indexer >= 0:
+                    return self.__fill(indexer + 1)[indexer]
+                return self.__fill()[indexer]
+            except IndexError:
+                raise IndexError(
+                    f"Generator index {indexer} is out of range") from None
         elif isinstance(indexer, slice):
-            start, stop = None, None
-            if indexer.start:
-                start = (len(self) + indexer.start) % len(self)
-            if indexer.stop:
-                stop = (len(self) + indexer.stop) % len(self)
-
-            return iter(
-                it for index, it in enumerate(self.__copy())
-                if start and start <= index or stop and stop >= index)
+            return iter(self.__fill()[indexer])
         else:
             raise KeyError(f"Key '{indexer}' is not a valid indexer.")
 
     def __len__(self) -> int:
-        if not self.__len:
-            self.__len = sum(1 for _ in self.__copy())
+        if self.__len is None:
+            self.__len = self.__length() if self.__length else len(
+                self.__fill())
         return self.__len
 
     def __contains__(self, item: Any) -> bool:
-        for it in self.__copy():
-            if it == item:
+        if item in self.__items:
+            return True
+        for i in self.__pull():
+            if i == item:
                 return True
-        else:
-            return False
+        return False
+
+    def __pull(self) -> Generator:
+        """Reads the stream into the buffer, yielding each new item"""
+        for i in self.__iterable:
+            self.__items.append(i)
+            yield i
+        self.__exhausted = True
 
-    def __copy(self) -> Generator:
-        self.__iterable, it = tee(self.__iterable)
-        return it
+    def __fill(self, n: int = None) -> List[Any]:
+        """The buffer, holding at least n items (all if None) when the
+        stream has that many"""
+        if not self.__exhausted and (n is None or len(self.__items) < n):
+            missing = None if n is None else n - len(self.__items)
+            for _ in islice(self.__pull(), missing):
+                pass
+        return self.__items
 
     def to_list(self) -> List[Any]:
-        return [*self.__copy()]
+        return [*self.__fill()]
 
 
 def chunks(lst: Iterable[Any], n: int) -> Generator:
@@ -76,10 +98,11 @@ def sample(it: Iterable[Any], size: int | float, random_state: int = None) -> It
 
     it_len = sum(1 for _ in it2)
 
-    indexes = RandomState(random_state).choice(
+    indexes = set(RandomState(random_state).choice(
         it_len,
         size if type(size) == int else int(it_len * size),
-        replace=False)
+        replace=False).tolist())
 
     return SubscriptableGenerator(
-        item for index, item in enumerate(it) if index in indexes)
+        (item for index, item in enumerate(it) if index in indexes),
+        lambda: len(indexes))
@@ -1,12 +1,10 @@
+from collections import Counter
+from itertools import chain
 from typing import Any, Callable, Dict, Iterable, Literal
 
 
 def are_instances(it: Iterable, dtype: object) -> bool:
-    it = iter(it)
-    while current := next(it, None):
-        if not isinstance(current, dtype):
-            return False
-    return True
+    return all(isinstance(current, dtype) for current in it)
 
 
 def apply(s: str, *args: Callable) -> str:
@@ -19,10 +17,8 @@ def count_dictionary(it: Iterable[Any],
                      sort_by: Literal["key", "value"] = "value",
                      reversed: bool = False,
                      n: int = None) -> Dict[str, int]:
-    d = {}
-    for i in it:
-        for j in i:
-            d[j] = d.get(j, 0) + 1
+    # one count per key of each item, a mapping item's values are ignored
+    d = Counter(chain.from_iterable(it))
     return {
         k: v for k, v in sorted(
             d.items(),
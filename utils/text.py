@@ -1,50 +1,106 @@
+import heapq
 import re
 import string
+from collections import Counter
 from functools import lru_cache
-from typing import Any, Dict, Iterable, List
+from operator import itemgetter
+from typing import Any, Dict, FrozenSet, Iterable, List
 
-from nltk import FreqDist, everygrams, pos_tag, sent_tokenize
-from nltk.corpus import stopwords, wordnet
+from nltk import pos_tag, sent_tokenize
+from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 
-
-def is_stop_word(s: str, stop_words: Iterable[str] = []) -> bool:
-    stop_words = [*set(stopwords.words("english"))
-                  .union(stop_words)
-                  .union(["'s", "'ll", "n't", "'d", "'ve", "'m", "'re", "'"])]
-    return s in stop_words
+try:
+    # faster matching engine, installed with nltk, same pattern syntax
+    import regex as _re
+except ImportError:
+    _re = re
+
+
+NAME_INVERSION_RE = _re.compile(
+    r"(?P<last>([a-z]+\s)?[A-Z][a-z]+)\,\s?(?P<first>([A-Z]([a-z]+|\.?)\ ?)+)")
+NAME_RE = _re.compile(r"(?:(?P<name>([A-Z]([a-z]+|\.?)\s?)+\b)\s?.*)")
+TEXT_WRAP_RE = _re.compile(r"-\n+")
+WHITESPACE_RE = _re.compile(r"\s+")
+TAG_RE = _re.compile(r"<[^<]+?>")
+# str.translate tables, a single C pass each instead of a regex scan
+SYMBOLS_TABLE = dict.fromkeys(
+    [code
+     for first, last in [(0x00, 0x1f), (0x7f, 0xa3), (0xab, 0xb4),
+                         (0xb9, 0xbc), (0xbf, 0xc5), (0xc8, 0xce),
+                         (0xd9, 0xdc), (0xdf, 0xdf), (0xf7, 0xf9),
+                         (0xfe, 0xff)]
+     for code in range(first, last + 1)],
+    " ")
+LINK_RE = _re.compile(r'https?:\/\/.*[\r\n]*')
+# hyphens and apostrophes are kept, so is the backslash, which the former
+# [...] pattern escaped the closing bracket with
+PUNCTUATION_TABLE = dict.fromkeys(
+    map(ord, re.sub(r"[-'\\]", "", string.punctuation)), " ")
+NUMERIC_RE = _re.compile(r"\S*\d+\S*")
+# ASCII text is left as is by the cp869 round trip, so lowercasing and
+# symbol removal (and punctuation, when no link is removed in between)
+# fold into one translate
+LOWER_SYMBOLS_TABLE = {**SYMBOLS_TABLE,
+                       **{code: code + 32 for code in range(0x41, 0x5b)}}
+CLEAN_TABLE = {**LOWER_SYMBOLS_TABLE, **PUNCTUATION_TABLE}
+
+
+@lru_cache(maxsize=1)
+def english_stop_words() -> FrozenSet[str]:
+    """Loaded on first use, importing this module needs no NLTK data"""
+    return frozenset(stopwords.words("english")).union(
+        ["'s", "'ll", "n't", "'d", "'ve", "'m", "'re", "'"])
+
+
+@lru_cache(maxsize=32)
+def merged_stop_words(extra: FrozenSet[str]) -> FrozenSet[str]:
+    """English stop words plus extra, built once per distinct extra set"""
+    return english_stop_words() | extra if extra else english_stop_words()
+
+
+def is_stop_word(s: str, stop_words: Iterable[str] = frozenset()) -> bool:
+    return s in english_stop_words() or s in stop_words
 
 
 def extract_name(s: str) -> str:
-    s = re.sub(
-        r"(?P<last>([a-z]+\s)?[A-Z][a-z]+)\,\s?(?P<first>([A-Z]([a-z]+|\.?)\ ?)+)",
-        r"\g<first> \g<last>", s)
-    s = re.sub(
-        r"(?:(?P<name>([A-Z]([a-z]+|\.?)\s?)+\b)\s?.*)",
-        r"\g<name>", s)
+    s = NAME_INVERSION_RE.sub(r"\g<first> \g<last>", s)
+    s = NAME_RE.sub(r"\g<name>", s)
     return s
 
 
 def fix_text_wraps(s: str) -> str:
-    s = re.sub(r"-\n+", r"", s)
-    s = re.sub(r"\s+", r" ", s)
+    s = TEXT_WRAP_RE.sub(r"", s)
+    s = WHITESPACE_RE.sub(r" ", s)
     return s
 
 
-@lru_cache(maxsize=None)
 def strip_tags(s: str) -> str:
-    return re.sub(r"<[^<]+?>", r"", s)
+    return TAG_RE.sub(r"", s)
 
 
-def get_wordnet_pos(sentence: List[str]) -> Any:
-    tag_dict = {
-        "J": wordnet.ADJ,
-        "N": wordnet.NOUN,
-        "V": wordnet.VERB,
-        "R": wordnet.ADV}
+# wordnet.ADJ, NOUN, VERB and ADV, as literals since reading them off the
+# lazy corpus loader would load WordNet at import
+WORDNET_TAGS = {
+    "J": "a",
+    "N": "n",
+    "V": "v",
+    "R": "r"}
+
+
+LEMMATIZER = WordNetLemmatizer()
+
 
-    for index, tag in enumerate(sentence):
-        yield sentence[index], tag_dict.get(tag[1][0].upper(), wordnet.NOUN)
+@lru_cache(maxsize=200_000)
+def lemmatize(token: str, pos: str) -> str:
+    # words repeat a lot across a corpus, each (token, pos) hits WordNet once
+    return LEMMATIZER.lemmatize(token, pos)
+
+
+def get_wordnet_pos(sentence: List[str]) -> Any:
+    # the whole sentence is tagged in one call, the tags depend on context
+    for token, tag in pos_tag(sentence):
+        yield token, WORDNET_TAGS.get(tag[:1].upper(), "n")
 
 
 def clean_text(s: str, **kwargs) -> str | Iterable[str]:
@@ -59,77 +115,122 @@ def clean_text(s: str, **kwargs) -> str | Iterable[str]:
     __lemmatize = kwargs.get("lemmatize", True)
     __as_string = kwargs.get("as_string", True)
 
-    stop_words = kwargs.get("stop_words", [])
-    punctuation = r"[{0}]".format(re.sub(r"[-']", "", string.punctuation))
-
-    # Lowercase
-    s = s.lower() if __lowercase else s
-
-    # Strip tags
-    s = strip_tags(s) if __strip_tags else s
-
-    # Symbols
-    s = s.encode("cp869", errors='ignore').decode("cp869")
-    s = re.sub(
-        r"["
-        r"\x00-\x1f"
-        r"\x7f-\xa3"
-        r"\xab-\xb4"
-        r"\xb9-\xbc"
-        r"\xbf-\xc5"
-        r"\xc8-\xce"
-        r"\xd9-\xdc"
-        r"\xdf"
-        r"\xf7-\xf9"
-        r"\xfe-\xff"
-        r"]",
-        r' ', s
-    ) if __symbols else s
+    # merged once per distinct stop_words, then probed once or twice per token
+    stop_words = merged_stop_words(frozenset(kwargs.get("stop_words", ())))
+
+    fused = __lowercase and __symbols and s.isascii()
+    fused_punctuation = fused and __punctuation and not __links
+
+    if fused:
+        # Strip tags, then lowercase and symbols in one pass
+        s = strip_tags(s) if __strip_tags else s
+        s = s.translate(
+            CLEAN_TABLE if fused_punctuation else LOWER_SYMBOLS_TABLE)
+    else:
+        # Lowercase
+        s = s.lower() if __lowercase else s
+
+        # Strip tags
+        s = strip_tags(s) if __strip_tags else s
+
+        # Symbols
+        s = s.encode("cp869", errors='ignore').decode("cp869")
+        s = s.translate(SYMBOLS_TABLE) if __symbols else s
 
     # Links
-    s = re.sub(r'https?:\/\/.*[\r\n]*', '', s) if __links else s
+    s = LINK_RE.sub('', s) if __links else s
 
     # Punctuation
-    s = re.sub(punctuation, " ", s) if __punctuation else s
+    if __punctuation and not fused_punctuation:
+        s = s.translate(PUNCTUATION_TABLE)
 
-    # line breaks
-    s = fix_text_wraps(s)
+    # line breaks, whitespace runs are dropped by the split below
+    s = TEXT_WRAP_RE.sub(r"", s)
 
     # Numerics
-    s = re.sub(r"\S*\d+\S*", r"", s) if __numbers else s
+    s = NUMERIC_RE.sub(r"", s) if __numbers else s
 
     # Remove extra characteres
     s = [*filter(lambda x: len(x) > 2, s.split())]
 
     tokens = []
-    lemmatizer = WordNetLemmatizer()
     for token, pos in get_wordnet_pos(s):
-        if is_stop_word(token, stop_words):
+        if token in stop_words:
             continue
 
-        token = lemmatizer.lemmatize(token, pos) if __lemmatize else token
+        token = lemmatize(token, pos) if __lemmatize else token
 
-        if not is_stop_word(token, stop_words):
+        if token not in stop_words:
             tokens.append(token)
 
     return " ".join(tokens).strip() if __as_string else tokens
 
 
-def extract_ngrams(s: str, **kwargs) -> Dict:
-    sort_by = kwargs.get("sort_by", "frequency")
-    reverse = kwargs.get("reverse", True)
-    ngrams = {}
+def count_frequent_ngrams(tokens: List[str],
+                          min_frequency: int,
+                          max_n: int = 3) -> Counter:
+    """Counts the 1 to max_n-grams seen at least min_frequency times
 
-    s = clean_text(s, as_string=False)
-    freq_dist = FreqDist(everygrams(s, 1, 3))
-    for ngram, frequency in freq_dist.items():
-        ngram = " ".join(ngram)
-        ngrams[ngram] = ngrams.get(ngram, 0) + frequency
+    An ngram is never more frequent than the (n-1)-grams it contains, so
+    each order only counts the windows whose prefix and suffix survived
+    the previous one
+    """
+    ngrams = Counter()
+    frequent = {(token,): frequency
+                for token, frequency in Counter(tokens).items()
+                if frequency >= min_frequency}
 
-    return dict(sorted(
-        ngrams.items(), reverse=reverse,
-        key=lambda item: item[0 if sort_by == "ngram" else 1]))
+    for n in range(2, max_n + 1):
+        ngrams.update({" ".join(gram): freq for gram, freq in frequent.items()})
+        candidates = Counter(
+            window for window in zip(*(tokens[i:] for i in range(n)))
+            if window[:-1] in frequent and window[1:] in frequent)
+        frequent = {gram: frequency
+                    for gram, frequency in candidates.items()
+                    if frequency >= min_frequency}
+    ngrams.update({" ".join(gram): freq for gram, freq in frequent.items()})
 
+    return ngrams
 
-def split_sentences(s: str) -> List[str]:
+
+def extract_ngrams(s: str, **kwargs) -> Dict:
+    sort_by = kwargs.get("sort_by", "frequency")
+    reverse = kwargs.get("reverse", True)
+    top_k = kwargs.get("top_k", None)
+    min_frequency = kwargs.get("min_frequency", 1)
+
+    tokens = clean_text(s, as_string=False)
+    if min_frequency > 1:
+        ngrams = count_frequent_ngrams(tokens, min_frequency)
+    else:
+        # unigrams, bigrams and trigrams counted over sliding windows of
+        # the tokens in one pass each, joined straight into their keys
+        ngrams = Counter(tokens)
+        for n in (2, 3):
+            ngrams.update(map(" ".join, zip(*(tokens[i:] for i in range(n)))))
+
+    key = itemgetter(0 if sort_by == "ngram" else 1)
+    if top_k is not None:
+        # same as sorting and slicing, in O(n log k)
+        select = heapq.nlargest if reverse else heapq.nsmallest
+        return dict(select(top_k, ngrams.items(), key=key))
+
+    return dict(sorted(ngrams.items(), reverse=reverse, key=key))
+
+
+@lru_cache(maxsize=1)
+def spacy_sentencizer():
+    """Rule-based spaCy pipeline, only imported when asked for"""
+    import spacy
+
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    return nlp
+
+
+def split_sentences(s: str, backend: str = "nltk") -> List[str]:
+    """Splits s into sentences with NLTK's Punkt (default) or, with
+    backend="spacy", spaCy's much faster rule-based sentencizer"""
+    if backend == "spacy":
+        return [sentence.text for sentence in spacy_sentencizer()(s).sents]
     return sent_tokenize(s)